@@ -4,17 +4,31 @@ Handles various tasks including email drafts using MCP servers
 """
 
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, Callable, Awaitable
 import re
 
-from .mcp_manager import call_mcp_tool, get_mcp_servers
+from .mcp_manager import call_mcp_tool, get_mcp_servers, get_config_version, get_server_keywords
 from .email_utils import (
-    extract_email_content, detect_tone, build_context_string,
-    format_mcp_arguments, create_error_response
+    extract_email_content, build_context_string,
+    format_mcp_arguments, create_error_response,
+    TONE_KEYWORDS, URGENCY_KEYWORDS
 )
+from .schema import RequestClassification
 
 logger = logging.getLogger(__name__)
 
+# Email-related keywords, matched by the fused classifier below
+EMAIL_KEYWORDS = (
+    "email", "邮件", "reply", "回复", "draft", "草稿",
+    "message", "信息", "mail", "写邮件", "发邮件"
+)
+
+GENERAL_CAPABILITIES = (
+    "Email draft generation",
+    "Email reply generation",
+    "Tone detection"
+)
+
 def detect_task_type(user_request: str) -> str:
     """
     Detect the type of task from user request.
@@ -25,20 +39,90 @@ def detect_task_type(user_request: str) -> str:
     Returns:
         Task type (email_draft, general_query, etc.)
     """
-    user_request_lower = user_request.lower()
+    return classify_request(user_request).task_type
+
+# (config version, pattern, keyword -> labels) of the fused classifier
+_classifier_cache: Optional[tuple] = None
+
+def _build_classifier(server_keywords: Dict[str, str]) -> tuple:
+    """
+    Build the fused keyword matcher used by classify_request.
+    
+    Each keyword maps to the (category, label) pairs of every keyword that is a
+    prefix of it, longest first. The pattern is a lookahead, so the longest
+    keyword starting at every position is reported and overlapping keywords
+    are all seen in a single pass.
+    """
+    labels_by_keyword: Dict[str, list] = {}
+    for keyword in EMAIL_KEYWORDS:
+        labels_by_keyword.setdefault(keyword, []).append(("task_type", "email_draft"))
+    for tone, keywords in TONE_KEYWORDS:
+        for keyword in keywords:
+            labels_by_keyword.setdefault(keyword, []).append(("tone", tone))
+    for urgency, keywords in URGENCY_KEYWORDS:
+        for keyword in keywords:
+            labels_by_keyword.setdefault(keyword, []).append(("urgency", urgency))
+    for keyword, server_name in server_keywords.items():
+        labels_by_keyword.setdefault(keyword, []).append(("server", server_name))
+    
+    keywords_longest_first = sorted(labels_by_keyword, key=len, reverse=True)
+    table = {
+        keyword: tuple(
+            label
+            for prefix in keywords_longest_first if keyword.startswith(prefix)
+            for label in labels_by_keyword[prefix]
+        )
+        for keyword in labels_by_keyword
+    }
+    pattern = re.compile("(?=(" + "|".join(map(re.escape, keywords_longest_first)) + "))")
+    return pattern, table
+
+def classify_request(user_request: str) -> RequestClassification:
+    """
+    Detect task type, tone, urgency and target MCP server in one pass.
+    
+    This is the single source of truth for request classification; tone and
+    urgency keywords are checked in TONE_KEYWORDS / URGENCY_KEYWORDS priority
+    order and the leftmost server keyword picks the server.
+    
+    Args:
+        user_request: User's input request
+        
+    Returns:
+        RequestClassification tuple
+    """
+    global _classifier_cache
+    
+    config_version = get_config_version()
+    if _classifier_cache is None or _classifier_cache[0] != config_version:
+        # With a single server every request routes to it (via the fallback below),
+        # so its keywords are left out of the pattern entirely
+        server_keywords = get_server_keywords() if len(get_mcp_servers()) > 1 else {}
+        _classifier_cache = (config_version, *_build_classifier(server_keywords))
+    _, pattern, table = _classifier_cache
     
-    # Email-related keywords
-    email_keywords = [
-        "email", "邮件", "reply", "回复", "draft", "草稿",
-        "message", "信息", "mail", "写邮件", "发邮件"
-    ]
+    matched = set()
+    server = None
+    for match in pattern.finditer(user_request.lower()):
+        for category, label in table[match.group(1)]:
+            if category != "server":
+                matched.add((category, label))
+            elif server is None:
+                # Leftmost server keyword wins, as in find_server_by_keywords
+                server = label
     
-    for keyword in email_keywords:
-        if keyword in user_request_lower:
-            return "email_draft"
+    task_type = "email_draft" if ("task_type", "email_draft") in matched else "general_query"
+    tone = next((t for t, _ in TONE_KEYWORDS if ("tone", t) in matched), "professional")
+    if tone == "urgent" or ("urgency", "high") in matched:
+        urgency = "high"
+    elif ("urgency", "low") in matched:
+        urgency = "low"
+    else:
+        urgency = "normal"
+    if server is None:
+        server = next(iter(get_mcp_servers()), None)
     
-    # Default to general query
-    return "general_query"
+    return RequestClassification(task_type, tone, urgency, server)
 
 def validate_input(input_data: Dict[str, Any]) -> bool:
     """
@@ -77,44 +161,47 @@ async def process_task(input_data: Dict[str, Any]) -> Dict[str, Any]:
         user_request = input_data.get("user_request", "")
         context = input_data.get("context", {})
         
-        # Detect task type
-        task_type = detect_task_type(user_request)
-        logger.info(f"Detected task type: {task_type} for request: {user_request[:50]}...")
+        # Classify once; the handler reuses tone, urgency and server from it
+        classification = classify_request(user_request)
+        logger.debug("Detected task type: %s for request: %.50s...", classification.task_type, user_request)
         
         # Route to appropriate handler
-        if task_type == "email_draft":
-            return await handle_email_task(user_request, context)
-        else:
-            return await handle_general_task(user_request, context)
+        handler = TASK_HANDLERS.get(classification.task_type, handle_general_task)
+        return await handler(user_request, context, classification)
             
     except Exception as e:
         logger.error(f"Task processing failed: {e}")
         return create_error_response(f"Task processing error: {str(e)}")
 
-async def handle_email_task(user_request: str, context: Dict[str, Any]) -> Dict[str, Any]:
+async def handle_email_task(user_request: str, context: Dict[str, Any],
+                            classification: Optional[RequestClassification] = None) -> Dict[str, Any]:
     """
     Handle email-related tasks.
     
     Args:
         user_request: User's request
         context: Additional context
+        classification: Classification of user_request, computed here if omitted
         
     Returns:
         Email task result
     """
     try:
-        # Extract email content and detect tone
+        if classification is None:
+            classification = classify_request(user_request)
+        
+        # Extract email content; tone, urgency and server come from the classification
         original_email = extract_email_content(user_request)
-        tone = detect_tone(user_request)
-        context_str = build_context_string(user_request, tone)
+        tone = classification.tone
+        context_str = build_context_string(classification.urgency)
         
         # Prepare arguments for MCP call
         arguments = format_mcp_arguments(original_email, tone, context_str)
         
-        logger.info(f"Processing email task with tone: {tone}")
+        logger.debug("Processing email task with tone: %s", tone)
         
         # Call MCP server for email draft generation
-        result = await call_mcp_tool("generate_email_draft", arguments)
+        result = await call_mcp_tool("generate_email_draft", arguments, classification.server)
         
         if result.get("success"):
             # Add task type information
@@ -132,13 +219,15 @@ async def handle_email_task(user_request: str, context: Dict[str, Any]) -> Dict[
         logger.error(f"Email task processing failed: {e}")
         return create_error_response(f"Email processing error: {str(e)}")
 
-async def handle_general_task(user_request: str, context: Dict[str, Any]) -> Dict[str, Any]:
+async def handle_general_task(user_request: str, context: Dict[str, Any],
+                              classification: Optional[RequestClassification] = None) -> Dict[str, Any]:
     """
     Handle general tasks that don't fit specific categories.
     
     Args:
         user_request: User's request
         context: Additional context
+        classification: Classification of user_request (unused for now)
         
     Returns:
         General task result
@@ -154,11 +243,7 @@ async def handle_general_task(user_request: str, context: Dict[str, Any]) -> Dic
             "data": {
                 "message": "General task processing is not yet implemented",
                 "suggestion": "For email-related tasks, try: 'help me reply to this email: [email content]'",
-                "available_capabilities": [
-                    "Email draft generation",
-                    "Email reply generation", 
-                    "Tone detection"
-                ]
+                "available_capabilities": GENERAL_CAPABILITIES
             }
         }
         
@@ -166,17 +251,35 @@ async def handle_general_task(user_request: str, context: Dict[str, Any]) -> Dic
         logger.error(f"General task processing failed: {e}")
         return create_error_response(f"General task error: {str(e)}")
 
+# Task type -> handler dispatch table; unknown types fall back to the general handler
+TASK_HANDLERS: Dict[str, Callable[[str, Dict[str, Any], RequestClassification], Awaitable[Dict[str, Any]]]] = {
+    "email_draft": handle_email_task,
+    "general_query": handle_general_task,
+}
+
+# (config version, capabilities) of the last capabilities build
+_capabilities_cache: Optional[tuple] = None
+
 async def get_agent_capabilities() -> Dict[str, Any]:
     """
     Get agent capabilities and available tasks.
     
+    The result only depends on the loaded MCP servers, so it is built once
+    per config version and reused until the config is reloaded.
+    
     Returns:
         Agent capabilities information
     """
+    global _capabilities_cache
+    
     try:
+        config_version = get_config_version()
+        if _capabilities_cache and _capabilities_cache[0] == config_version:
+            return _capabilities_cache[1]
+        
         servers = get_mcp_servers()
         
-        return {
+        capabilities = {
             "agent_type": "general_multi_task",
             "supported_tasks": [
                 {
@@ -203,6 +306,8 @@ async def get_agent_capabilities() -> Dict[str, Any]:
                 "MCP server integration"
             ]
         }
+        _capabilities_cache = (config_version, capabilities)
+        return capabilities
         
     except Exception as e:
         logger.error(f"Failed to get agent capabilities: {e}")
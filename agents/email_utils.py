@@ -3,12 +3,33 @@ Email Utility Functions
 Consolidated email processing utilities
 """
 
-import re
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, Tuple
 import logging
 
+from .mcp_client import get_result_text
+from .schema import ErrorResponse
+
 logger = logging.getLogger(__name__)
 
+SUPPORTED_TONES = ("professional", "casual", "urgent", "formal", "friendly")
+SUPPORTED_TYPES = ("reply", "draft", "forward", "thank_you", "follow_up")
+
+# Separators that precede the pasted email, in priority order
+EMAIL_CONTENT_SEPARATORS = ("：", ":", "邮件", "内容是", "下面的")
+
+# Tone and urgency keyword tables, checked in priority order against the
+# lowercased request (Chinese keywords are unaffected by lowercasing)
+TONE_KEYWORDS = (
+    ("casual", ("轻松", "casual")),
+    ("urgent", ("紧急", "urgent")),
+    ("formal", ("正式", "formal")),
+    ("friendly", ("友好", "friendly")),
+)
+URGENCY_KEYWORDS = (
+    ("high", ("紧急", "urgent")),
+    ("low", ("慢", "slow")),
+)
+
 def extract_email_content(user_request: str) -> str:
     """
     Extract email content from user request.
@@ -19,71 +40,24 @@ def extract_email_content(user_request: str) -> str:
     Returns:
         Extracted email content
     """
-    patterns = ["：", ":", "邮件", "内容是", "下面的"]
-    
-    for pattern in patterns:
-        if pattern in user_request:
-            parts = user_request.split(pattern)
-            if len(parts) > 1:
-                return parts[-1].strip()
+    for separator in EMAIL_CONTENT_SEPARATORS:
+        # Text after the last occurrence, without materializing every split segment
+        index = user_request.rfind(separator)
+        if index != -1:
+            return user_request[index + len(separator):].strip()
     
     return user_request
 
-def detect_tone(user_request: str) -> str:
-    """
-    Detect tone from user request.
-    
-    Args:
-        user_request: User's input request
-        
-    Returns:
-        Detected tone (professional, casual, urgent, etc.)
-    """
-    user_request_lower = user_request.lower()
-    
-    if "轻松" in user_request or "casual" in user_request_lower:
-        return "casual"
-    elif "紧急" in user_request or "urgent" in user_request_lower:
-        return "urgent"
-    elif "正式" in user_request or "formal" in user_request_lower:
-        return "formal"
-    elif "友好" in user_request or "friendly" in user_request_lower:
-        return "friendly"
-    else:
-        return "professional"
-
-def detect_urgency(user_request: str, tone: str) -> str:
-    """
-    Detect urgency level from user request and tone.
-    
-    Args:
-        user_request: User's input request
-        tone: Detected tone
-        
-    Returns:
-        Urgency level (high, normal, low)
-    """
-    user_request_lower = user_request.lower()
-    
-    if tone == "urgent" or "紧急" in user_request or "urgent" in user_request_lower:
-        return "high"
-    elif "慢" in user_request or "slow" in user_request_lower:
-        return "low"
-    else:
-        return "normal"
-
-def build_context_string(user_request: str, tone: str) -> str:
+def build_context_string(urgency: str) -> str:
     """
     Build context string for MCP server.
     
     Args:
-        user_request: User's input request
-        tone: Detected tone
+        urgency: Detected urgency (high, normal, low)
         
     Returns:
         Context string for MCP server
     """
-    urgency = detect_urgency(user_request, tone)
     return f"Reply type: reply, Urgency: {urgency}"
 
 def validate_email_request(input_data: Dict[str, Any]) -> bool:
@@ -135,15 +109,14 @@ def parse_mcp_response(mcp_result: Any) -> Dict[str, Any]:
     """
     return {
         "success": True,
-        "raw_mcp_result": str(mcp_result),
         "mcp_result_type": str(type(mcp_result)),
         "data": {
             "reply_subject": "MCP Response",
-            "reply_body": str(mcp_result)
+            "reply_body": get_result_text(mcp_result)
         }
     }
 
-def create_error_response(error_message: str, additional_info: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+def create_error_response(error_message: str, additional_info: Optional[Dict[str, Any]] = None) -> ErrorResponse:
     """
     Create error response.
     
@@ -154,20 +127,15 @@ def create_error_response(error_message: str, additional_info: Optional[Dict[str
     Returns:
         Error response dictionary
     """
-    response = {
-        "success": False,
-        "error": error_message
-    }
-    
     if additional_info:
-        response.update(additional_info)
+        return {"success": False, "error": error_message, **additional_info}
     
-    return response
+    return {"success": False, "error": error_message}
 
-def get_supported_tones() -> List[str]:
-    """Get list of supported email tones."""
-    return ["professional", "casual", "urgent", "formal", "friendly"]
+def get_supported_tones() -> Tuple[str, ...]:
+    """Get supported email tones."""
+    return SUPPORTED_TONES
 
-def get_supported_types() -> List[str]:
-    """Get list of supported email types."""
-    return ["reply", "draft", "forward", "thank_you", "follow_up"]
\ No newline at end of file
+def get_supported_types() -> Tuple[str, ...]:
+    """Get supported email types."""
+    return SUPPORTED_TYPES
\ No newline at end of file
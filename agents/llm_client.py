@@ -1,6 +1,8 @@
 from typing import Any, Dict, List
 import os
-from openai import AzureOpenAI
+import socket
+import httpx
+from openai import AsyncAzureOpenAI
 from dotenv import load_dotenv
 
 # 加载 .env 文件中的环境变量
@@ -9,8 +11,21 @@ load_dotenv()
 # 全局客户端实例
 _client = None
 
+# 部署名在进程启动时解析一次，避免每次调用都查询 os.environ
+_DEPLOYMENT = os.getenv("AZURE_OPENAI_MODEL", os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME"))
+
+# 连接池配置：所有 LLM 调用复用同一组 keep-alive 连接
+LLM_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64)
+LLM_HTTP_TIMEOUT = httpx.Timeout(60.0)
+
+# 关闭 Nagle 算法并开启 TCP keep-alive，避免小请求被合并延迟、空闲连接被中间设备静默断开
+LLM_SOCKET_OPTIONS = [
+    (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+]
+
 def get_llm_client():
-    """Get or create the Azure OpenAI client."""
+    """Get or create the async Azure OpenAI client."""
     global _client
     if _client is None:
         # 从环境变量获取配置
@@ -18,13 +33,24 @@ def get_llm_client():
         subscription_key = os.getenv("AZURE_OPENAI_API_KEY")
         api_version = os.getenv("AZURE_OPENAI_API_VERSION", "2024-12-01-preview")
         
-        _client = AzureOpenAI(
+        _client = AsyncAzureOpenAI(
             api_version=api_version,
             azure_endpoint=endpoint,
             api_key=subscription_key,
+            http_client=httpx.AsyncClient(
+                transport=httpx.AsyncHTTPTransport(limits=LLM_HTTP_LIMITS, socket_options=LLM_SOCKET_OPTIONS),
+                timeout=LLM_HTTP_TIMEOUT,
+            ),
         )
     return _client
 
+async def close_llm_client():
+    """Close the shared client and its connection pool (application shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
 async def call_llm(
     messages: List[Dict[str, str]],
     temperature: float = 0.7,
@@ -45,10 +71,10 @@ async def call_llm(
         Exception: If the LLM call fails
     """
     client = get_llm_client()
-    deployment = os.getenv("AZURE_OPENAI_MODEL", os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME"))
     
-    response = client.chat.completions.create(
-        model=deployment,
+    # Awaited so the event loop keeps serving other requests during the LLM round trip
+    response = await client.chat.completions.create(
+        model=_DEPLOYMENT,
         messages=messages,
         temperature=temperature,
         max_tokens=max_tokens
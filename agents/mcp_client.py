@@ -4,26 +4,48 @@ Provides a wrapper around the MCP Python SDK for seamless integration.
 """
 
 import asyncio
-import json
 import logging
 from typing import Dict, Any, Optional, List
-from contextlib import asynccontextmanager
 
+import orjson
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def get_result_text(result: Any) -> Any:
+    """
+    Extract the useful payload of an MCP tool result without stringifying
+    the whole result object.
+    
+    Args:
+        result: Raw result returned by a tool call
+        
+    Returns:
+        The result itself for str/dict results, the joined text content for
+        CallToolResult-style objects, or repr(result) as a last resort
+    """
+    if isinstance(result, (str, dict)):
+        return result
+    
+    content = getattr(result, "content", None)
+    if content is not None:
+        texts = [item.text for item in content if getattr(item, "type", None) == "text"]
+        if texts:
+            return "\n".join(texts)
+    
+    return repr(result)
+
+
 class MCPClient:
     """
     MCP Client wrapper that provides async context manager support
     and convenient methods for tool execution.
     """
     
-    def __init__(self, server_script_path: str = None, server_cmd: str = "python", server_command: str = None, server_args: List[str] = None, timeout: int = 30):
+    def __init__(self, server_script_path: str = None, server_cmd: str = "python", server_command: str = None, server_args: List[str] = None, timeout: int = 30,
+                 init_timeout: Optional[float] = None, call_timeout: Optional[float] = None, list_timeout: Optional[float] = None):
         """
         Initialize MCP Client.
         
@@ -32,7 +54,10 @@ class MCPClient:
             server_cmd: Command to run the server (legacy support)
             server_command: Command to run the server (new way)
             server_args: Arguments for the server command (new way)
-            timeout: Timeout for operations in seconds
+            timeout: Default for any of the timeouts below that is not given, in seconds
+            init_timeout: Timeout for starting the server and the initialize handshake
+            call_timeout: Timeout for call_tool and read_resource
+            list_timeout: Timeout for list_tools and list_resources
         """
         # Support both old and new initialization methods
         if server_command and server_args:
@@ -53,36 +78,116 @@ class MCPClient:
             raise ValueError("Either (server_command, server_args) or server_script_path must be provided")
         
         self.timeout = timeout
+        self.init_timeout = init_timeout if init_timeout is not None else timeout
+        self.call_timeout = call_timeout if call_timeout is not None else timeout
+        self.list_timeout = list_timeout if list_timeout is not None else timeout
         self.session = None
         self._client_ctx = None
         self._read = None
         self._write = None
         
+        # Long-lived session state (see start/stop)
+        self._owner_task: Optional[asyncio.Task] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        self._start_lock = asyncio.Lock()
+    
+    @property
+    def is_connected(self) -> bool:
+        """Whether a long-lived session opened with start() is alive and initialized."""
+        return (
+            self._owner_task is not None
+            and not self._owner_task.done()
+            and self.session is not None
+        )
+    
+    async def start(self) -> "MCPClient":
+        """
+        Open a long-lived session that stays up until stop() is called.
+        
+        The stdio transport is entered and exited inside a dedicated background
+        task, because its task group must be closed by the task that opened it.
+        Calling start() on a connected client is a no-op.
+        """
+        if self.is_connected:
+            return self
+        
+        async with self._start_lock:
+            if self.is_connected:
+                return self
+            
+            ready = asyncio.get_running_loop().create_future()
+            self._stop_event = asyncio.Event()
+            self._owner_task = asyncio.create_task(self._run_session(ready))
+            try:
+                # Shielded so a cancelled caller cannot cancel the future the owner
+                # task resolves; the timeout covers server start and handshake
+                await asyncio.wait_for(asyncio.shield(ready), timeout=self.init_timeout)
+            except asyncio.TimeoutError:
+                self._owner_task.cancel()
+                await asyncio.gather(self._owner_task, return_exceptions=True)
+                self._owner_task = None
+                self._stop_event = None
+                raise
+        
+        return self
+    
+    async def _run_session(self, ready: asyncio.Future):
+        """Hold the session open until stop() is requested."""
+        try:
+            async with self:
+                ready.set_result(None)
+                await self._stop_event.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                logger.error(f"MCP session terminated: {e}")
+        finally:
+            self.session = None
+    
+    async def stop(self):
+        """Close the long-lived session opened with start()."""
+        if self._owner_task is None:
+            return
+        
+        self._stop_event.set()
+        try:
+            await self._owner_task
+        except Exception as e:
+            logger.error(f"Error stopping MCP session: {e}")
+        finally:
+            self._owner_task = None
+            self._stop_event = None
+        
     async def __aenter__(self):
         """Async context manager entry."""
+        session = None
         try:
+            # Entered directly: wait_for would run it in a child task (Python < 3.12),
+            # and the stdio task group must be exited by the task that entered it.
+            # start() bounds this step with init_timeout instead.
             self._client_ctx = stdio_client(self.server_params)
-            self._read, self._write = await asyncio.wait_for(
-                self._client_ctx.__aenter__(),
-                timeout=self.timeout
-            )
+            self._read, self._write = await self._client_ctx.__aenter__()
             
-            self.session = ClientSession(self._read, self._write)
-            await self.session.__aenter__()
+            session = ClientSession(self._read, self._write)
+            await session.__aenter__()
             
             # Initialize the session
             await asyncio.wait_for(
-                self.session.initialize(),
-                timeout=self.timeout
+                session.initialize(),
+                timeout=self.init_timeout
             )
             
+            # Published only after the handshake, so is_connected never reports a
+            # half-initialized session and concurrent start() callers keep waiting
+            self.session = session
             logger.info("MCP Client session initialized successfully")
             return self
             
         except Exception as e:
             logger.error(f"Failed to initialize MCP client: {e}")
-            if self.session:
-                await self.session.__aexit__(type(e), e, e.__traceback__)
+            if session:
+                await session.__aexit__(type(e), e, e.__traceback__)
             if self._client_ctx:
                 await self._client_ctx.__aexit__(type(e), e, e.__traceback__)
             raise
@@ -106,7 +211,7 @@ class MCPClient:
         try:
             tools_response = await asyncio.wait_for(
                 self.session.list_tools(),
-                timeout=self.timeout
+                timeout=self.list_timeout
             )
             return tools_response.tools
         except Exception as e:
@@ -121,7 +226,7 @@ class MCPClient:
         try:
             result = await asyncio.wait_for(
                 self.session.call_tool(tool_name, arguments),
-                timeout=self.timeout
+                timeout=self.call_timeout
             )
             return result
         except Exception as e:
@@ -136,7 +241,7 @@ class MCPClient:
         try:
             resources_response = await asyncio.wait_for(
                 self.session.list_resources(),
-                timeout=self.timeout
+                timeout=self.list_timeout
             )
             return resources_response.resources
         except Exception as e:
@@ -151,7 +256,7 @@ class MCPClient:
         try:
             result = await asyncio.wait_for(
                 self.session.read_resource(resource_uri),
-                timeout=self.timeout
+                timeout=self.call_timeout
             )
             return result
         except Exception as e:
@@ -190,18 +295,27 @@ class EmailMCPClient(MCPClient):
         try:
             result = await self.call_tool("generate_email_draft", arguments)
             
-            # Debug: log the actual result structure
-            logger.info(f"MCP call result type: {type(result)}")
-            logger.info(f"MCP call result: {result}")
+            # Debug: log the actual result structure (formatted only when DEBUG is enabled)
+            logger.debug("MCP call result type=%s result=%r", type(result), result)
+            
+            # Take the tool's text content once; a JSON object reply is used as structured data
+            text = get_result_text(result)
+            data = text if isinstance(text, dict) else None
+            if isinstance(text, str):
+                try:
+                    parsed = orjson.loads(text)
+                except orjson.JSONDecodeError:
+                    parsed = None
+                if isinstance(parsed, dict):
+                    data = parsed
             
-            # Return raw result without any parsing
             return {
                 "success": True,
-                "raw_mcp_result": str(result),
+                "raw_mcp_result": text,
                 "mcp_result_type": str(type(result)),
-                "data": {
+                "data": data if data is not None else {
                     "reply_subject": "MCP Tool Response",
-                    "reply_body": str(result)
+                    "reply_body": text
                 }
             }
             
@@ -234,7 +348,8 @@ class EmailMCPClient(MCPClient):
             }
 
 
-def create_mcp_client(server_script_path: str = None, client_type: str = "email", server_command: str = None, server_args: List[str] = None) -> MCPClient:
+def create_mcp_client(server_script_path: str = None, client_type: str = "email", server_command: str = None, server_args: List[str] = None,
+                      init_timeout: Optional[float] = None, call_timeout: Optional[float] = None, list_timeout: Optional[float] = None) -> MCPClient:
     """
     Factory function to create MCP clients.
     
@@ -243,20 +358,20 @@ def create_mcp_client(server_script_path: str = None, client_type: str = "email"
         client_type: Type of client to create ("email" or "generic")
         server_command: Command to run the server (new way)
         server_args: Arguments for the server command (new way)
+        init_timeout: Timeout for server start and initialization
+        call_timeout: Timeout for tool calls and resource reads
+        list_timeout: Timeout for tool and resource listings
         
     Returns:
         MCPClient instance
     """
-    if client_type == "email":
-        if server_command and server_args:
-            return EmailMCPClient(server_command=server_command, server_args=server_args)
-        else:
-            return EmailMCPClient(server_script_path=server_script_path)
+    client_class = EmailMCPClient if client_type == "email" else MCPClient
+    timeouts = {"init_timeout": init_timeout, "call_timeout": call_timeout, "list_timeout": list_timeout}
+    
+    if server_command and server_args:
+        return client_class(server_command=server_command, server_args=server_args, **timeouts)
     else:
-        if server_command and server_args:
-            return MCPClient(server_command=server_command, server_args=server_args)
-        else:
-            return MCPClient(server_script_path=server_script_path)
+        return client_class(server_script_path=server_script_path, **timeouts)
 
 
 # Example usage for testing
@@ -285,4 +400,5 @@ async def test_mcp_client():
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     asyncio.run(test_mcp_client())
\ No newline at end of file
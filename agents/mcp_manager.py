@@ -4,32 +4,127 @@ Centralized management of all MCP servers and their configurations
 """
 
 import os
-import json
+import re
+import time
+import asyncio
+import contextlib
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from pathlib import Path
 
-from .mcp_client import MCPClient
+import anyio
+import orjson
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED
+
+from .mcp_client import MCPClient, get_result_text
 
 logger = logging.getLogger(__name__)
 
 # Global MCP configuration
 MCP_CONFIG_FILE = "mcp.config"
+_MCP_CONFIG_PATH = Path(MCP_CONFIG_FILE)
 mcp_servers = {}
 
-def load_mcp_config():
-    """Load MCP servers from configuration file."""
-    global mcp_servers
+# Include the full repr of tool results in responses (debugging only, it is
+# a second full copy of the payload)
+INCLUDE_RAW_MCP_RESULT = os.getenv("MCP_INCLUDE_RAW_RESULT", "false").lower() == "true"
+
+# (st_mtime_ns, st_size) of the config file at the last successful load
+_last_config_stat: Optional[tuple] = None
+
+# Bumped on every effective config load so derived data can be cached per version
+_config_version = 0
+
+# Clients replaced by a config reload whose sessions still need closing
+_retired_clients: List[MCPClient] = []
+
+# Tool listings per server as (monotonic fetch time, tools); tool definitions are
+# semi-static, so they are cached for TOOLS_CACHE_TTL seconds (<= 0: until reload)
+TOOLS_CACHE_TTL = float(os.getenv("MCP_TOOLS_CACHE_TTL", "300"))
+_tools_cache: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
+
+# Per-server locks so concurrent cache misses share a single list_tools call
+_tools_locks: Dict[str, asyncio.Lock] = {}
+
+# MCP client timeouts in seconds: server start + handshake, tool calls (these include
+# the server's own LLM round trip), and tool/resource listings
+MCP_INIT_TIMEOUT = float(os.getenv("MCP_INIT_TIMEOUT", "30"))
+MCP_CALL_TIMEOUT = float(os.getenv("MCP_CALL_TIMEOUT", "30"))
+MCP_LIST_TIMEOUT = float(os.getenv("MCP_LIST_TIMEOUT", "10"))
+
+# Maximum in-flight requests per MCP server session (<= 0: unbounded). A tool
+# call holds its slot for the server's whole LLM round trip, so a small cap
+# directly limits draft throughput; it is opt-in for servers that need it.
+MCP_MAX_CONCURRENCY = int(os.getenv("MCP_MAX_CONCURRENCY", "0"))
+_server_semaphores: Dict[str, asyncio.Semaphore] = {}
+_NO_SLOT_LIMIT = contextlib.nullcontext()
+
+# Background startup task opening sessions ahead of the first request
+_warm_up_task: Optional[asyncio.Task] = None
+
+# Keyword routing table, rebuilt whenever the config is loaded
+_keyword_to_server: Dict[str, str] = {}
+_keyword_re: Optional[re.Pattern] = None
+
+def _build_keyword_index():
+    """Compile all server keywords into one alternation with a keyword -> server side table."""
+    global _keyword_to_server, _keyword_re
+    
+    keyword_to_server = {}
+    for server_name, server_info in mcp_servers.items():
+        for keyword in server_info.get('keywords', []):
+            keyword_to_server.setdefault(keyword.lower(), server_name)
+    
+    _keyword_to_server = keyword_to_server
+    # Longest keywords first so e.g. "邮件回复" wins over "邮件" at the same position
+    _keyword_re = re.compile(
+        "|".join(re.escape(k) for k in sorted(keyword_to_server, key=len, reverse=True))
+    ) if keyword_to_server else None
+
+# Serialized /agent/servers response body, rebuilt whenever the config is loaded
+_servers_response_bytes = orjson.dumps({"servers": [], "total": 0})
+
+def _build_servers_response():
+    """Serialize the server listing once so the route can return the bytes as-is."""
+    global _servers_response_bytes
+    
+    server_list = [
+        {
+            "name": server_name,
+            "command": server_info['command'],
+            "args": server_info['args'],
+            "description": server_info['description'],
+            "keywords": server_info['keywords']
+        }
+        for server_name, server_info in mcp_servers.items()
+    ]
+    _servers_response_bytes = orjson.dumps({"servers": server_list, "total": len(server_list)})
+
+def load_mcp_config(force: bool = False):
+    """
+    Load MCP servers from configuration file.
+    
+    The parse is skipped when the file's mtime and size are unchanged since
+    the last load, and servers whose command/args are unchanged keep their
+    existing client instance.
+    
+    Args:
+        force: Reparse the file even if it looks unchanged
+    """
+    global _last_config_stat, _config_version
     
     try:
-        if not os.path.exists(MCP_CONFIG_FILE):
-            logger.error(f"❌ MCP config file not found: {MCP_CONFIG_FILE}")
+        st = _MCP_CONFIG_PATH.stat()
+        config_stat = (st.st_mtime_ns, st.st_size)
+        if not force and config_stat == _last_config_stat:
+            logger.info("📋 MCP config unchanged, skipping reload")
             return
         
-        with open(MCP_CONFIG_FILE, 'r', encoding='utf-8') as f:
-            config = json.load(f)
+        config = orjson.loads(_MCP_CONFIG_PATH.read_bytes())
         
         servers_config = config.get('mcpServers', {})
+        loaded_servers = {}
         
         for server_name, server_config in servers_config.items():
             command = server_config.get('command', 'python')
@@ -37,25 +132,50 @@ def load_mcp_config():
             description = server_config.get('description', f"MCP Server: {server_name}")
             keywords = server_config.get('keywords', [])
             
-            # Create MCP client
-            client = MCPClient(
-                server_command=command,
-                server_args=args,
-                timeout=30
-            )
+            previous = mcp_servers.get(server_name)
+            if previous and previous['command'] == command and previous['args'] == args:
+                # Same process definition, keep the existing client and its session
+                client = previous['client']
+            else:
+                if previous:
+                    _retired_clients.append(previous['client'])
+                # Create MCP client
+                client = MCPClient(
+                    server_command=command,
+                    server_args=args,
+                    init_timeout=MCP_INIT_TIMEOUT,
+                    call_timeout=MCP_CALL_TIMEOUT,
+                    list_timeout=MCP_LIST_TIMEOUT
+                )
             
-            mcp_servers[server_name] = {
+            loaded_servers[server_name] = {
                 'client': client,
                 'command': command,
                 'args': args,
+                'cmdline': f"{command} {' '.join(args)}",
                 'description': description,
                 'keywords': keywords
             }
             
-            logger.info(f"✅ Loaded MCP server: {server_name}")
+            logger.info("✅ Loaded MCP server: %s", server_name)
+        
+        for server_name, server_info in mcp_servers.items():
+            if server_name not in loaded_servers:
+                _retired_clients.append(server_info['client'])
         
+        # Update in place so references returned by get_mcp_servers() stay valid
+        mcp_servers.clear()
+        mcp_servers.update(loaded_servers)
+        _last_config_stat = config_stat
+        _config_version += 1
+        invalidate_tools_cache()
+        
+        _build_keyword_index()
+        _build_servers_response()
         logger.info(f"📋 Loaded {len(mcp_servers)} MCP servers")
         
+    except FileNotFoundError:
+        logger.error(f"❌ MCP config file not found: {MCP_CONFIG_FILE}")
     except Exception as e:
         logger.error(f"❌ Failed to load MCP config: {e}")
 
@@ -63,15 +183,27 @@ def get_mcp_servers() -> Dict[str, Dict[str, Any]]:
     """Get all loaded MCP servers."""
     return mcp_servers
 
-def find_server_by_keywords(text: str) -> Optional[str]:
+def get_server_keywords() -> Dict[str, str]:
+    """Get the lowercased keyword -> server routing table."""
+    return _keyword_to_server
+
+def get_servers_response_bytes() -> bytes:
+    """Get the serialized server listing for the current config."""
+    return _servers_response_bytes
+
+def get_config_version() -> int:
+    """Get the current MCP config version (changes whenever the config is reloaded)."""
+    return _config_version
+
+def find_server_by_keywords(text: str, text_lower: Optional[str] = None) -> Optional[str]:
     """Find MCP server by keyword matching."""
-    text_lower = text.lower()
+    if text_lower is None:
+        text_lower = text.lower()
     
-    for server_name, server_info in mcp_servers.items():
-        keywords = server_info.get('keywords', [])
-        for keyword in keywords:
-            if keyword.lower() in text_lower:
-                return server_name
+    if _keyword_re is not None:
+        match = _keyword_re.search(text_lower)
+        if match:
+            return _keyword_to_server[match.group(0)]
     
     # Fallback to first server if no match
     return next(iter(mcp_servers.keys())) if mcp_servers else None
@@ -98,6 +230,86 @@ def get_mcp_client(server_name: Optional[str] = None) -> Optional[MCPClient]:
     
     return None
 
+async def _get_session(server_name: str) -> MCPClient:
+    """Return the server's long-lived MCP session, starting it on first use."""
+    client = mcp_servers[server_name]['client']
+    return await client.start()
+
+def _server_slot(server_name: str):
+    """Async context manager bounding concurrent requests to one server."""
+    if MCP_MAX_CONCURRENCY <= 0:
+        return _NO_SLOT_LIMIT
+    
+    semaphore = _server_semaphores.get(server_name)
+    if semaphore is None:
+        semaphore = _server_semaphores[server_name] = asyncio.Semaphore(MCP_MAX_CONCURRENCY)
+    return semaphore
+
+# Errors meaning the server's stdio pipe is gone; anything else (tool errors,
+# per-call timeouts) leaves the shared session to the other in-flight calls
+_TRANSPORT_ERRORS = (
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+    ConnectionError,
+    EOFError,
+)
+
+def _is_transport_error(error: Exception) -> bool:
+    """Whether an error means the server's connection is gone."""
+    if isinstance(error, McpError):
+        # The SDK reports a server that exited mid-request as "Connection closed"
+        return error.error.code == CONNECTION_CLOSED
+    return isinstance(error, _TRANSPORT_ERRORS)
+
+async def _reset_session_on_error(server_name: str, error: Exception):
+    """
+    Drop a server's session after a transport-level failure so the next call
+    reconnects. Tool-level MCP errors and timeouts leave the session alone.
+    """
+    if not _is_transport_error(error) or server_name not in mcp_servers:
+        return
+    
+    await mcp_servers[server_name]['client'].stop()
+
+async def warm_up_mcp_sessions():
+    """
+    Connect to all MCP servers and cache their tool listings ahead of the
+    first request (application startup). Runs in the background and is
+    best-effort: servers that fail are retried lazily on first use.
+    
+    Requests that arrive while a server is still starting do not open a second
+    session: MCPClient.start() holds its lock until the handshake completes, so
+    they wait for the warm-up's session, and listings wait on the tools lock.
+    """
+    global _warm_up_task
+    
+    async def warm_up_all():
+        names = list(mcp_servers)
+        results = await asyncio.gather(
+            *(_list_server_tools(name) for name in names),
+            return_exceptions=True
+        )
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logger.warning(f"⚠️ MCP warm-up failed for {name}: {result}")
+        logger.info("🔥 MCP warm-up finished")
+    
+    _warm_up_task = asyncio.create_task(warm_up_all())
+
+async def close_mcp_sessions():
+    """Close all long-lived MCP sessions (application shutdown)."""
+    if _warm_up_task is not None and not _warm_up_task.done():
+        _warm_up_task.cancel()
+    
+    clients = [info['client'] for info in mcp_servers.values()] + _retired_clients
+    _retired_clients.clear()
+    
+    for client in clients:
+        await client.stop()
+    
+    logger.info("🔌 Closed MCP sessions")
+
 async def call_mcp_tool(tool_name: str, arguments: Dict[str, Any], server_name: Optional[str] = None) -> Dict[str, Any]:
     """
     Call MCP server tool.
@@ -128,37 +340,43 @@ async def call_mcp_tool(tool_name: str, arguments: Dict[str, Any], server_name:
             }
         
         server_info = mcp_servers[server_name]
-        client = server_info['client']
         
-        logger.info(f"🔧 Calling MCP server: {server_name}")
-        logger.info(f"📤 Command: {server_info['command']} {' '.join(server_info['args'])}")
-        logger.info(f"🛠️  Tool: {tool_name}")
-        logger.info(f"📝 Arguments: {arguments}")
+        # Lazy %-formatting: nothing is interpolated unless the record is emitted
+        logger.info("🔧 Calling MCP server: %s (%s), tool: %s", server_name, server_info['cmdline'], tool_name)
+        logger.debug("📝 Arguments: %s", arguments)
         
-        async with client as mcp_session:
+        mcp_session = await _get_session(server_name)
+        async with _server_slot(server_name):
             result = await mcp_session.call_tool(tool_name, arguments)
-            
-            logger.info(f"✅ MCP call successful")
-            
-            return {
-                "success": True,
-                "server_name": server_name,
-                "tool_name": tool_name,
-                "raw_mcp_result": str(result),
-                "mcp_result_type": str(type(result)),
-                "server_info": {
-                    "command": server_info['command'],
-                    "args": server_info['args'],
-                    "description": server_info['description']
-                },
-                "data": {
-                    "reply_subject": "MCP Response",
-                    "reply_body": str(result)
-                }
+        
+        logger.debug("✅ MCP call successful")
+        
+        reply_body = get_result_text(result)
+        
+        response = {
+            "success": True,
+            "server_name": server_name,
+            "tool_name": tool_name,
+            "mcp_result_type": str(type(result)),
+            "server_info": {
+                "command": server_info['command'],
+                "args": server_info['args'],
+                "description": server_info['description']
+            },
+            "data": {
+                "reply_subject": "MCP Response",
+                "reply_body": reply_body
             }
+        }
+        if INCLUDE_RAW_MCP_RESULT:
+            response["raw_mcp_result"] = repr(result)
+        
+        return response
     
     except Exception as e:
         logger.error(f"❌ MCP call failed: {e}")
+        if server_name:
+            await _reset_session_on_error(server_name, e)
         return {
             "success": False,
             "server_name": server_name,
@@ -171,6 +389,71 @@ async def call_mcp_tool(tool_name: str, arguments: Dict[str, Any], server_name:
             } if server_name and server_name in mcp_servers else {}
         }
 
+def _tool_to_dict(tool: Any, server_name: str) -> Dict[str, Any]:
+    """Normalize a listed tool (SDK model or plain dict) into a plain dict tagged with its server."""
+    if isinstance(tool, dict):
+        return {**tool, 'server_name': server_name}
+    
+    return {
+        'name': tool.name,
+        'description': getattr(tool, 'description', None) or '',
+        'inputSchema': getattr(tool, 'inputSchema', None) or {},
+        'server_name': server_name
+    }
+
+def invalidate_tools_cache(server_name: Optional[str] = None):
+    """
+    Drop cached tool listings.
+    
+    Args:
+        server_name: Server to invalidate, if None invalidates all servers
+    """
+    if server_name is None:
+        _tools_cache.clear()
+    else:
+        _tools_cache.pop(server_name, None)
+
+def _get_cached_tools(server_name: str) -> Optional[List[Dict[str, Any]]]:
+    """Return the server's cached tool listing if it has not expired."""
+    entry = _tools_cache.get(server_name)
+    if entry is None:
+        return None
+    
+    fetched_at, tools = entry
+    if TOOLS_CACHE_TTL > 0 and time.monotonic() - fetched_at >= TOOLS_CACHE_TTL:
+        return None
+    return tools
+
+async def _list_server_tools(server_name: str) -> List[Dict[str, Any]]:
+    """List tools from one server, tagging each with its server name (cached)."""
+    tools = _get_cached_tools(server_name)
+    if tools is not None:
+        return tools
+    
+    lock = _tools_locks.get(server_name)
+    if lock is None:
+        lock = _tools_locks[server_name] = asyncio.Lock()
+    
+    async with lock:
+        # Another request may have filled the cache while we waited
+        tools = _get_cached_tools(server_name)
+        if tools is not None:
+            return tools
+        
+        try:
+            mcp_session = await _get_session(server_name)
+            async with _server_slot(server_name):
+                server_tools = await mcp_session.list_tools()
+        except Exception as e:
+            await _reset_session_on_error(server_name, e)
+            raise
+        
+        # Normalized once here so callers and the cache only ever see plain dicts
+        server_tools = [_tool_to_dict(tool, server_name) for tool in server_tools]
+        
+        _tools_cache[server_name] = (time.monotonic(), server_tools)
+        return server_tools
+
 async def get_available_mcp_tools(server_name: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     Get available tools from MCP server.
@@ -186,26 +469,20 @@ async def get_available_mcp_tools(server_name: Optional[str] = None) -> List[Dic
     try:
         if server_name and server_name in mcp_servers:
             # Get tools from specific server
-            server_info = mcp_servers[server_name]
-            client = server_info['client']
-            
-            async with client as mcp_session:
-                server_tools = await mcp_session.list_tools()
-                for tool in server_tools:
-                    tool['server_name'] = server_name
-                tools.extend(server_tools)
+            tools.extend(await _list_server_tools(server_name))
         else:
-            # Get tools from all servers
-            for name, server_info in mcp_servers.items():
-                try:
-                    client = server_info['client']
-                    async with client as mcp_session:
-                        server_tools = await mcp_session.list_tools()
-                        for tool in server_tools:
-                            tool['server_name'] = name
-                        tools.extend(server_tools)
-                except Exception as e:
-                    logger.error(f"Failed to get tools from {name}: {e}")
+            # Get tools from all servers concurrently
+            names = list(mcp_servers)
+            results = await asyncio.gather(
+                *(_list_server_tools(name) for name in names),
+                return_exceptions=True
+            )
+            
+            for name, result in zip(names, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Failed to get tools from {name}: {result}")
+                else:
+                    tools.extend(result)
         
         return tools
         
@@ -235,21 +512,21 @@ async def get_mcp_resource(resource_uri: str, server_name: Optional[str] = None)
                 "available_servers": list(mcp_servers.keys())
             }
         
-        server_info = mcp_servers[server_name]
-        client = server_info['client']
-        
-        async with client as mcp_session:
+        mcp_session = await _get_session(server_name)
+        async with _server_slot(server_name):
             result = await mcp_session.read_resource(resource_uri)
-            
-            return {
-                "success": True,
-                "server_name": server_name,
-                "resource_uri": resource_uri,
-                "data": result
-            }
+        
+        return {
+            "success": True,
+            "server_name": server_name,
+            "resource_uri": resource_uri,
+            "data": result
+        }
     
     except Exception as e:
         logger.error(f"Failed to get resource {resource_uri}: {e}")
+        if server_name:
+            await _reset_session_on_error(server_name, e)
         return {
             "success": False,
             "error": str(e),
@@ -259,7 +536,14 @@ async def get_mcp_resource(resource_uri: str, server_name: Optional[str] = None)
 async def reload_mcp_config() -> Dict[str, Any]:
     """Reload MCP configuration."""
     try:
+        # An explicit reload always refreshes tool listings, even if the file is unchanged
+        invalidate_tools_cache()
         load_mcp_config()
+        
+        # Close sessions of servers that were removed or redefined
+        while _retired_clients:
+            await _retired_clients.pop().stop()
+        
         return {
             "success": True,
             "message": "Configuration reloaded",
@@ -276,7 +560,7 @@ def get_mcp_debug_info() -> Dict[str, Any]:
     """Get MCP debug information."""
     return {
         "config_file": MCP_CONFIG_FILE,
-        "config_exists": os.path.exists(MCP_CONFIG_FILE),
+        "config_exists": _MCP_CONFIG_PATH.exists(),
         "servers": {
             name: {
                 "command": info['command'],
@@ -287,6 +571,3 @@ def get_mcp_debug_info() -> Dict[str, Any]:
             for name, info in mcp_servers.items()
         }
     }
-
-# Initialize MCP configuration on module import
-load_mcp_config()
\ No newline at end of file
@@ -4,7 +4,7 @@ Data models for multi-task agent processing
 """
 
 from pydantic import BaseModel
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, TypedDict, NamedTuple
 
 class TaskRequest(BaseModel):
     """Request for general task processing"""
@@ -37,4 +37,18 @@ class GeneralTaskData(BaseModel):
     """Data for general tasks"""
     message: str
     suggestion: Optional[str] = None
-    available_capabilities: List[str] = []
\ No newline at end of file
+    available_capabilities: List[str] = []
+
+class RequestClassification(NamedTuple):
+    """Result of classifying a user request in one keyword pass"""
+    task_type: str
+    tone: str
+    urgency: str
+    server: Optional[str]
+
+class ErrorResponse(TypedDict, total=False):
+    """Shape of error dicts returned by agent and MCP functions (plain dict at runtime)"""
+    success: bool
+    error: str
+    task_type: str
+    mcp_error: Optional[str]
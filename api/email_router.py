@@ -4,17 +4,19 @@ Wraps email agent functionality with FastAPI endpoints
 """
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse
 from typing import Dict, Any, Optional
 import logging
 
 from schemas import DoTaskRequest, ServerToolRequest
 from agents.agent import process_task, get_agent_capabilities
+from agents.mcp_manager import get_available_mcp_tools, get_mcp_resource
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/email", tags=["email"])
+router = APIRouter(prefix="/email", tags=["email"], default_response_class=ORJSONResponse)
 
-@router.post("/do-task")
+@router.post("/do-task", response_model=None)
 async def email_do_task(request: DoTaskRequest):
     """
     Process email-related tasks using the email agent.
@@ -31,7 +33,7 @@ async def email_do_task(request: DoTaskRequest):
         logger.error(f"Email task processing failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/generate-reply")
+@router.post("/generate-reply", response_model=None)
 async def generate_reply(request: dict):
     """
     Legacy endpoint for email reply generation.
@@ -50,7 +52,7 @@ async def generate_reply(request: dict):
         logger.error(f"Email reply generation failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/capabilities")
+@router.get("/capabilities", response_model=None)
 async def get_capabilities():
     """Get email processing capabilities."""
     try:
@@ -64,7 +66,6 @@ async def get_capabilities():
 async def get_email_tools():
     """Get available email processing tools."""
     try:
-        from agents.mcp_manager import get_available_mcp_tools
         tools = await get_available_mcp_tools()
         return {
             "tools": tools,
@@ -78,7 +79,6 @@ async def get_email_tools():
 async def get_email_templates():
     """Get email templates."""
     try:
-        from agents.mcp_manager import get_mcp_resource
         templates = await get_mcp_resource("email://templates")
         return templates
     except Exception as e:
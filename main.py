@@ -3,52 +3,134 @@ Nablax Backend - Main FastAPI Application Entry Point
 MCP-compliant three-tier email reply service with function-based architecture.
 """
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 import logging
+import logging.handlers
+import os
+import queue
 
 from api.email_router import router as email_router
-from agents.mcp_manager import load_mcp_config, get_mcp_servers
+from routes import setup_main_routes, setup_agent_routes, setup_system_routes
+from agents.mcp_manager import load_mcp_config, get_mcp_servers, warm_up_mcp_sessions, close_mcp_sessions
+from agents.llm_client import close_llm_client
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_log_listener = None
+
+# Root handlers replaced by setup_logging, put back by shutdown_logging
+_previous_root_handlers = []
+
+def setup_logging():
+    """
+    Route all log records through a queue so handler I/O runs on a background
+    thread instead of blocking the event loop. LOG_LEVEL sets the root level.
+    """
+    global _log_listener, _previous_root_handlers
+    
+    if _log_listener is None:
+        log_queue = queue.Queue(-1)
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+        
+        root = logging.getLogger()
+        _previous_root_handlers = root.handlers[:]
+        root.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+        root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+        
+        _log_listener = logging.handlers.QueueListener(log_queue, stream_handler)
+        _log_listener.start()
+
+def shutdown_logging():
+    """
+    Flush queued log records, stop the background listener and put back the
+    root handlers, so later records are not queued with nothing draining them.
+    """
+    global _log_listener
+    
+    if _log_listener is not None:
+        logging.getLogger().handlers[:] = _previous_root_handlers
+        _log_listener.stop()
+        _log_listener = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application lifespan. MCP sessions are kept open across requests: they are
+    opened in the background at startup (unless MCP_WARM_UP=false) and closed on
+    shutdown together with the LLM client and the log listener.
+    """
+    if os.getenv("MCP_WARM_UP", "true").lower() == "true":
+        await warm_up_mcp_sessions()
+    try:
+        yield
+    finally:
+        await close_mcp_sessions()
+        await close_llm_client()
+        shutdown_logging()
+
 def create_app() -> FastAPI:
     """Create and configure FastAPI application."""
+    setup_logging()
+    
     app = FastAPI(
         title="Nablax Backend API",
         description="MCP-compliant three-tier email reply service with function-based architecture",
-        version="2.0.0"
+        version="2.0.0",
+        default_response_class=ORJSONResponse,
+        lifespan=lifespan
     )
 
-    # Add CORS middleware
+    # Add CORS middleware; CORS_ORIGINS is a comma-separated allowlist ("*" if unset).
+    # Credentials stay allowed either way: with "*" Starlette echoes the request's
+    # origin for credentialed requests, as before. Preflights are cacheable for a day.
+    cors_origins = [origin.strip() for origin in os.getenv("CORS_ORIGINS", "*").split(",") if origin.strip()]
     app.add_middleware(
         CORSMiddleware,
-        allow_origins=["*"],
+        allow_origins=cors_origins,
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        max_age=86400,
     )
     
-    # Include routers
+    # Register all routes before the app is returned
+    setup_main_routes(app)
+    setup_agent_routes(app)
+    setup_system_routes(app)
     app.include_router(email_router)
     
+    # Initialize MCP configuration
+    load_mcp_config()
+    
     return app
 
-# Create application instance
-app = create_app()
-
-# Setup routes
-from routes import setup_main_routes, setup_agent_routes, setup_system_routes
-
-setup_main_routes(app)
-setup_agent_routes(app)
-setup_system_routes(app)
-
-# Initialize MCP configuration
-load_mcp_config()
+# Create application instance when imported (uvicorn workers, tests); running this
+# file builds it in the __main__ block instead, so no process builds it twice
+if __name__ != "__main__":
+    app = create_app()
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    
+    # Each worker runs its own MCP server subprocesses, so workers default to 1.
+    # A single worker serves an app built here; multiple workers need an import
+    # string and each import "main" (and so build the app) themselves.
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    
+    # loop/http "auto" resolve to uvloop and httptools, which uvicorn[standard] installs
+    # (and fall back to asyncio/h11 where they are unavailable, e.g. uvloop on Windows).
+    uvicorn.run(
+        create_app() if workers == 1 else "main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="auto",
+        http="auto",
+        workers=workers,
+        backlog=2048,
+        access_log=os.getenv("ACCESS_LOG", "false").lower() == "true"
+    )
\ No newline at end of file
@@ -3,33 +3,152 @@ Application Routes
 Function-based route definitions for the FastAPI application
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse, Response
 from typing import Dict, Any, Optional, List
+import hashlib
 import logging
 
+import orjson
+from pydantic import ValidationError
+
 from schemas import DoTaskRequest, ServerToolRequest
 from agents.mcp_manager import (
     get_mcp_servers, call_mcp_tool, get_available_mcp_tools,
-    get_mcp_resource, reload_mcp_config, get_mcp_debug_info
+    get_mcp_resource, reload_mcp_config, get_mcp_debug_info, get_config_version,
+    get_servers_response_bytes
 )
 from agents.agent import process_task
 
 logger = logging.getLogger(__name__)
 
+def _orjson_default(obj: Any) -> Any:
+    """Serialize objects orjson does not support natively (e.g. MCP SDK pydantic models)."""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+class DirectJSONResponse(ORJSONResponse):
+    """
+    ORJSONResponse for handlers that return it directly, bypassing FastAPI's
+    jsonable_encoder walk; non-native types go through _orjson_default.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        return _dumps(content)
+
+def _dumps(content: Any) -> bytes:
+    """Serialize a response body the same way DirectJSONResponse does."""
+    return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+def _make_etag(body: bytes) -> str:
+    """Strong ETag for a response body."""
+    return '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+
+def _etag_response(request: Request, body: bytes, etag: Optional[str] = None) -> Response:
+    """
+    Return a JSON body tagged with its ETag, or an empty 304 when the client's
+    If-None-Match already names it.
+    
+    Args:
+        request: Incoming request
+        body: Serialized JSON body
+        etag: Precomputed ETag of body, computed here if omitted
+        
+    Returns:
+        200 response with the body, or 304 without one
+    """
+    if etag is None:
+        etag = _make_etag(body)
+    headers = {"ETag": etag}
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if etag in candidates or "*" in candidates:
+            return Response(status_code=304, headers=headers)
+    
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# (config version, body, etag) of the last /agent/servers build
+_servers_response_cache: Optional[tuple] = None
+
+# Static response parts, built (and for the debug flow, serialized) once at import
+_DEBUG_MCP_FLOW_BODY = orjson.dumps({
+    "mcp_architecture": {
+        "flow": [
+            "1. Client submits request to FastAPI (/do-task)",
+            "2. FastAPI analyzes input and routes to appropriate agent",
+            "3. Agent processes request using business logic",
+            "4. Agent calls MCP server via function-based MCP client",
+            "5. MCP Server processes request (LLM, tools, resources)",
+            "6. Response flows back: MCP -> Agent -> FastAPI -> Client"
+        ],
+        "services": {
+            "main_fastapi": {
+                "port": 8000,
+                "role": "Single service with function-based architecture",
+                "endpoints": ["/do-task", "/agent/do-task", "/email/*", "/capabilities"],
+                "features": ["agent_routing", "mcp_integration", "function_based"]
+            },
+            "general_agent": {
+                "role": "Multi-task processing with email capabilities",
+                "features": ["task_detection", "tone_detection", "content_extraction", "mcp_orchestration"]
+            },
+            "mcp_functions": {
+                "role": "MCP server communication functions",
+                "features": ["server_management", "tool_calling", "resource_access"]
+            },
+            "mcp_server": {
+                "port": "stdio",
+                "role": "Tool execution and LLM integration",
+                "protocol": "MCP Server",
+                "available_tools": ["generate_email_draft", "future_tools"],
+                "resources": ["email_templates", "best_practices"]
+            }
+        },
+        "mcp_protocol": "2024-11-05",
+        "communication": "FastAPI Functions ↔ MCP Server via stdio/subprocess",
+        "architecture": "Function-based with agent routing"
+    }
+})
+
+_ROOT_SKELETON = {
+    "message": "Nablax Backend API - Function-based Architecture",
+    "version": "2.0.0",
+    "architecture": "MCP-based three-tier system",
+    "protocol": "Model Context Protocol (MCP)"
+}
+
+_CAPABILITIES_SKELETON = {
+    "system_info": {
+        "name": "Nablax Backend API",
+        "version": "2.0.0",
+        "architecture": "MCP-based function-based service",
+        "protocol": "Model Context Protocol (MCP)"
+    },
+    "endpoints": {
+        "main_task": "/do-task",
+        "agent_task": "/agent/do-task",
+        "email_routes": "/email/*",
+        "health": "/health",
+        "capabilities": "/capabilities",
+        "debug": "/debug/mcp-flow"
+    }
+}
+
 def setup_main_routes(app: FastAPI):
     """Setup main application routes."""
     
     @app.get("/")
     async def root():
         servers = get_mcp_servers()
-        return {
-            "message": "Nablax Backend API - Function-based Architecture", 
-            "version": "2.0.0",
-            "architecture": "MCP-based three-tier system",
-            "protocol": "Model Context Protocol (MCP)",
+        return DirectJSONResponse({
+            **_ROOT_SKELETON,
             "mcp_servers": len(servers),
             "server_names": list(servers.keys())
-        }
+        })
 
     @app.get("/health")
     async def health():
@@ -42,8 +161,17 @@ def setup_main_routes(app: FastAPI):
             "server_names": list(servers.keys())
         }
 
-    @app.post("/do-task")
-    async def do_task(request: DoTaskRequest):
+    # The body is parsed by hand below; DoTaskRequest only documents it
+    @app.post(
+        "/do-task",
+        openapi_extra={
+            "requestBody": {
+                "required": True,
+                "content": {"application/json": {"schema": DoTaskRequest.model_json_schema()}}
+            }
+        }
+    )
+    async def do_task(request: Request):
         """
         Generic task processing endpoint with automatic intent detection.
         
@@ -55,10 +183,38 @@ def setup_main_routes(app: FastAPI):
         
         Flow: Client -> FastAPI -> Agent -> MCP Tool -> Response
         """
+        # input_data is passed straight through, so skip building a pydantic model;
+        # errors keep FastAPI's standard 422 shape (a list with body-prefixed loc)
+        try:
+            data = orjson.loads(await request.body())
+        except orjson.JSONDecodeError as e:
+            raise RequestValidationError([{
+                "type": "json_invalid", "loc": ("body", e.pos), "msg": "JSON decode error",
+                "input": {}, "ctx": {"error": e.msg}
+            }])
+        
+        if not isinstance(data, dict):
+            raise RequestValidationError([{
+                "type": "model_attributes_type", "loc": ("body",),
+                "msg": "Input should be a valid dictionary or object to extract fields from", "input": data
+            }])
+        
+        if "input_data" not in data:
+            raise RequestValidationError([{
+                "type": "missing", "loc": ("body", "input_data"), "msg": "Field required", "input": data
+            }])
+        
+        input_data = data["input_data"]
+        if not isinstance(input_data, dict):
+            raise RequestValidationError([{
+                "type": "dict_type", "loc": ("body", "input_data"),
+                "msg": "Input should be a valid dictionary", "input": input_data
+            }])
+        
         try:
             # Route to general agent for processing
-            result = await process_task(request.input_data)
-            return result
+            result = await process_task(input_data)
+            return DirectJSONResponse(result)
             
         except Exception as e:
             logger.error(f"❌ Task processing failed: {e}")
@@ -88,24 +244,18 @@ def setup_agent_routes(app: FastAPI):
             }
 
     @app.get("/agent/servers")
-    async def list_servers():
-        """List all MCP servers."""
-        servers = get_mcp_servers()
-        server_list = []
+    async def list_servers(request: Request):
+        """List all MCP servers (supports If-None-Match)."""
+        global _servers_response_cache
         
-        for server_name, server_info in servers.items():
-            server_list.append({
-                "name": server_name,
-                "command": server_info['command'],
-                "args": server_info['args'],
-                "description": server_info['description'],
-                "keywords": server_info['keywords']
-            })
+        # The body is prebuilt on config load; hash it once per config version
+        config_version = get_config_version()
+        if _servers_response_cache is None or _servers_response_cache[0] != config_version:
+            body = get_servers_response_bytes()
+            _servers_response_cache = (config_version, body, _make_etag(body))
         
-        return {
-            "servers": server_list,
-            "total": len(server_list)
-        }
+        _, body, etag = _servers_response_cache
+        return _etag_response(request, body, etag)
 
     @app.get("/agent/servers/{server_name}/tools")
     async def get_server_tools(server_name: str):
@@ -116,24 +266,41 @@ def setup_agent_routes(app: FastAPI):
         
         try:
             tools = await get_available_mcp_tools(server_name)
-            return {
+            return DirectJSONResponse({
                 "server_name": server_name,
                 "tools": tools,
                 "tool_count": len(tools)
-            }
+            })
         
         except Exception as e:
-            return {
+            return DirectJSONResponse({
                 "server_name": server_name,
                 "error": str(e),
                 "tools": []
-            }
+            })
 
-    @app.post("/agent/servers/{server_name}/tools/{tool_name}")
-    async def call_server_tool_direct(server_name: str, tool_name: str, request: ServerToolRequest):
+    @app.post(
+        "/agent/servers/{server_name}/tools/{tool_name}",
+        openapi_extra={
+            "requestBody": {
+                "required": True,
+                "content": {"application/json": {"schema": ServerToolRequest.model_json_schema()}}
+            }
+        }
+    )
+    async def call_server_tool_direct(server_name: str, tool_name: str, request: Request):
         """Direct tool call."""
+        # Validate straight from the raw bytes with pydantic-core's JSON parser
+        try:
+            tool_request = ServerToolRequest.model_validate_json(await request.body())
+        except ValidationError as e:
+            # Same 422 contract as FastAPI-validated bodies: loc is prefixed with "body"
+            raise RequestValidationError([
+                {**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)
+            ])
+        
         try:
-            result = await call_mcp_tool(tool_name, request.arguments, server_name)
+            result = await call_mcp_tool(tool_name, tool_request.arguments, server_name)
             return result
         except Exception as e:
             logger.error(f"❌ Direct tool call failed: {e}")
@@ -159,41 +326,28 @@ def setup_agent_routes(app: FastAPI):
     @app.get("/agent/debug")
     async def debug_info():
         """Debug information."""
-        return get_mcp_debug_info()
+        return DirectJSONResponse(get_mcp_debug_info())
 
 def setup_system_routes(app: FastAPI):
     """Setup system and debug routes."""
     
     @app.get("/capabilities")
-    async def get_capabilities():
-        """Get system capabilities and available MCP tools."""
+    async def get_capabilities(request: Request):
+        """Get system capabilities and available MCP tools (supports If-None-Match)."""
         try:
             # Get tools from all servers
             all_tools = await get_available_mcp_tools()
             servers = get_mcp_servers()
             
-            return {
-                "system_info": {
-                    "name": "Nablax Backend API",
-                    "version": "2.0.0",
-                    "architecture": "MCP-based function-based service",
-                    "protocol": "Model Context Protocol (MCP)"
-                },
-                "endpoints": {
-                    "main_task": "/do-task",
-                    "agent_task": "/agent/do-task",
-                    "email_routes": "/email/*",
-                    "health": "/health",
-                    "capabilities": "/capabilities",
-                    "debug": "/debug/mcp-flow"
-                },
+            return _etag_response(request, _dumps({
+                **_CAPABILITIES_SKELETON,
                 "mcp_tools": all_tools,
                 "mcp_servers": list(servers.keys()),
                 "mcp_compliant": True
-            }
+            }))
             
         except Exception as e:
-            return {
+            return DirectJSONResponse({
                 "system_info": {
                     "name": "Nablax Backend API",
                     "version": "2.0.0",
@@ -201,46 +355,9 @@ def setup_system_routes(app: FastAPI):
                 },
                 "error": f"Failed to fetch full capabilities: {str(e)}",
                 "basic_endpoints": ["/do-task", "/agent/do-task", "/email/*", "/health", "/capabilities"]
-            }
+            })
 
     @app.get("/debug/mcp-flow")
     async def debug_mcp_flow():
         """Debug endpoint to show the MCP flow and architecture."""
-        return {
-            "mcp_architecture": {
-                "flow": [
-                    "1. Client submits request to FastAPI (/do-task)",
-                    "2. FastAPI analyzes input and routes to appropriate agent",
-                    "3. Agent processes request using business logic",
-                    "4. Agent calls MCP server via function-based MCP client",
-                    "5. MCP Server processes request (LLM, tools, resources)",
-                    "6. Response flows back: MCP -> Agent -> FastAPI -> Client"
-                ],
-                "services": {
-                    "main_fastapi": {
-                        "port": 8000,
-                        "role": "Single service with function-based architecture",
-                        "endpoints": ["/do-task", "/agent/do-task", "/email/*", "/capabilities"],
-                        "features": ["agent_routing", "mcp_integration", "function_based"]
-                    },
-                    "general_agent": {
-                        "role": "Multi-task processing with email capabilities",
-                        "features": ["task_detection", "tone_detection", "content_extraction", "mcp_orchestration"]
-                    },
-                    "mcp_functions": {
-                        "role": "MCP server communication functions",
-                        "features": ["server_management", "tool_calling", "resource_access"]
-                    },
-                    "mcp_server": {
-                        "port": "stdio",
-                        "role": "Tool execution and LLM integration",
-                        "protocol": "MCP Server",
-                        "available_tools": ["generate_email_draft", "future_tools"],
-                        "resources": ["email_templates", "best_practices"]
-                    }
-                },
-                "mcp_protocol": "2024-11-05",
-                "communication": "FastAPI Functions ↔ MCP Server via stdio/subprocess",
-                "architecture": "Function-based with agent routing"
-            }
-        }
\ No newline at end of file
+        return Response(content=_DEBUG_MCP_FLOW_BODY, media_type="application/json")
@@ -3,13 +3,17 @@ Common Request/Response Schemas
 Shared data models for the FastAPI application
 """
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Dict, Any, Optional
 
 class DoTaskRequest(BaseModel):
     """Request for generic task processing"""
+    model_config = ConfigDict(extra="ignore")
+    
     input_data: Dict[str, Any]
     
 class ServerToolRequest(BaseModel):
     """Request for direct MCP server tool calls"""
+    model_config = ConfigDict(extra="ignore")
+    
     arguments: Dict[str, Any]
\ No newline at end of file
@@ -0,0 +1,12 @@
+"""
+Shared Test Fixtures
+The FastAPI app's TestClient, created once per interpreter
+"""
+
+from fastapi.testclient import TestClient
+
+from main import app
+
+# Enter it (``with CLIENT:``) around a test run so the app's startup and shutdown
+# handlers run as in production (MCP warm-up, MCP/LLM/logging shutdown)
+CLIENT = TestClient(app)
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Run All Test Suites
+Runs every test file's main() in one interpreter so imports and app setup are shared
+"""
+
+import sys
+
+import test_agent
+import test_health_check
+import test_llm_client
+import test_mcp_client
+
+def main():
+    """Run all test suites in-process."""
+    suites = [
+        ("Agent Classification", test_agent.main),
+        ("Health Check", test_health_check.main),
+        ("LLM Client", test_llm_client.main),
+        ("MCP Client", test_mcp_client.main),
+    ]
+    
+    failed_suites = []
+    for suite_name, suite_main in suites:
+        if not suite_main():
+            failed_suites.append(suite_name)
+        print()
+    
+    print("=== All Suites ===")
+    if failed_suites:
+        print(f"⚠️  Failed suites: {failed_suites}")
+        return False
+    
+    print("🎉 All test suites passed!")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Test Agent Request Classification
+Checks the fused classifier against a plain keyword-by-keyword reference
+"""
+
+import sys
+import os
+import tempfile
+from pathlib import Path
+from unittest import mock
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from agents.agent import classify_request, EMAIL_KEYWORDS
+from agents.email_utils import TONE_KEYWORDS, URGENCY_KEYWORDS
+import orjson
+
+import agents.mcp_manager
+from agents.mcp_manager import get_mcp_servers, load_mcp_config, find_server_by_keywords
+
+# Two servers, so server keywords stay in the classifier's pattern
+MULTI_SERVER_CONFIG = {
+    "mcpServers": {
+        "mail_server": {"command": "python", "args": ["mail.py"], "keywords": ["email", "邮件", "mail"]},
+        "calendar_server": {"command": "python", "args": ["calendar.py"], "keywords": ["meeting", "会议", "calendar"]},
+    }
+}
+
+SAMPLE_REQUESTS = (
+    "Schedule a meeting and send an email to the team",
+    "Reply to the calendar invite mail",
+
+    "help me reply to this email: Hello, I hope you're doing well.",
+    "帮我写一封紧急邮件：明天的会议取消了",
+    "Casual reply please, no rush, slow is fine",
+    "urgent and formal draft for the board",
+    "Formal FRIENDLY note about the weather",
+    "发邮件给老师，语气友好一点，不急慢慢来",
+    "What's the weather like today?",
+    "",
+)
+
+def reference_classification(user_request: str) -> tuple:
+    """Classify the way the original separate detectors did, one keyword at a time."""
+    text = user_request.lower()
+    
+    task_type = "email_draft" if any(k in text for k in EMAIL_KEYWORDS) else "general_query"
+    tone = next((t for t, keywords in TONE_KEYWORDS if any(k in text for k in keywords)), "professional")
+    if tone == "urgent":
+        urgency = "high"
+    else:
+        urgency = next((u for u, keywords in URGENCY_KEYWORDS if any(k in text for k in keywords)), "normal")
+    
+    return task_type, tone, urgency
+
+def test_classification_matches_reference():
+    """Test that classify_request agrees with the keyword-by-keyword reference."""
+    try:
+        mismatches = []
+        for user_request in SAMPLE_REQUESTS:
+            result = classify_request(user_request)
+            expected = reference_classification(user_request)
+            if (result.task_type, result.tone, result.urgency) != expected:
+                mismatches.append((user_request, tuple(result[:3]), expected))
+        
+        for user_request, got, expected in mismatches:
+            print(f"  ❌ {user_request!r}: got {got}, expected {expected}")
+        
+        if mismatches:
+            return False
+        
+        print(f"✅ {len(SAMPLE_REQUESTS)} requests classified like the reference")
+        return True
+    
+    except Exception as e:
+        print(f"❌ Error testing request classification: {e}")
+        return False
+
+def test_classification_server():
+    """Test that the classified server is one of the configured MCP servers."""
+    try:
+        load_mcp_config()
+        servers = get_mcp_servers()
+        if not servers:
+            print("⚠️  No MCP servers configured")
+            return False
+        
+        for user_request in SAMPLE_REQUESTS:
+            server = classify_request(user_request).server
+            if server not in servers:
+                print(f"❌ {user_request!r} routed to unknown server: {server}")
+                return False
+        
+        print(f"✅ All requests routed to configured servers: {list(servers.keys())}")
+        return True
+    
+    except Exception as e:
+        print(f"❌ Error testing server classification: {e}")
+        return False
+
+def test_classification_multi_server():
+    """Test that with several servers the classifier routes like find_server_by_keywords."""
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            config_path = Path(tmp_dir) / "mcp.config"
+            config_path.write_bytes(orjson.dumps(MULTI_SERVER_CONFIG))
+            
+            try:
+                with mock.patch.object(agents.mcp_manager, "_MCP_CONFIG_PATH", config_path):
+                    load_mcp_config(force=True)
+                
+                mismatches = [
+                    (user_request, classify_request(user_request).server, find_server_by_keywords(user_request))
+                    for user_request in SAMPLE_REQUESTS
+                ]
+                mismatches = [m for m in mismatches if m[1] != m[2]]
+            finally:
+                # Back to the real configuration for the other tests
+                load_mcp_config(force=True)
+        
+        for user_request, got, expected in mismatches:
+            print(f"  ❌ {user_request!r}: routed to {got}, expected {expected}")
+        
+        if mismatches:
+            return False
+        
+        print(f"✅ {len(SAMPLE_REQUESTS)} requests routed like find_server_by_keywords across 2 servers")
+        return True
+    
+    except Exception as e:
+        print(f"❌ Error testing multi-server classification: {e}")
+        return False
+
+def main():
+    """Run all agent classification tests."""
+    print("=== Testing Agent Classification ===\n")
+    
+    tests = [
+        ("Classification vs Reference", test_classification_matches_reference),
+        ("Classification Server", test_classification_server),
+        ("Classification Multi-Server", test_classification_multi_server),
+    ]
+    
+    passed = 0
+    failed = 0
+    
+    for test_name, test_func in tests:
+        print(f"Running {test_name}...")
+        try:
+            if test_func():
+                passed += 1
+                print(f"✅ {test_name} passed\n")
+            else:
+                failed += 1
+                print(f"❌ {test_name} failed\n")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test_name} crashed: {e}\n")
+    
+    print("=== Agent Classification Test Results ===")
+    print(f"✅ Passed: {passed}")
+    print(f"❌ Failed: {failed}")
+    print(f"📊 Total: {passed + failed}")
+    
+    if failed == 0:
+        print("\n🎉 All agent classification tests passed!")
+        return True
+    else:
+        print(f"\n⚠️  {failed} test(s) failed.")
+        return False
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
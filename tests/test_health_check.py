@@ -6,17 +6,39 @@ Tests the health check endpoints and service status
 
 import sys
 import os
+import time
 import asyncio
 import httpx
+import orjson
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
+from main import app
+from _shared import CLIENT
+
+# Shared pooled client for tests that talk to a running server on localhost:8000
+_http_client = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared async HTTP client, creating it on first use."""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+            timeout=5.0
+        )
+    return _http_client
+
+async def close_http_client():
+    """Close the shared async HTTP client (end of the test run)."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
 async def test_health_endpoint_structure():
     """Test that health endpoint returns correct structure."""
     try:
-        from main import app
-        from fastapi.testclient import TestClient
-        
-        client = TestClient(app)
+        client = CLIENT
         response = client.get("/health")
         
         print(f"📊 Health endpoint status: {response.status_code}")
@@ -25,7 +47,7 @@ async def test_health_endpoint_structure():
             print(f"❌ Health endpoint returned status {response.status_code}")
             return False
         
-        data = response.json()
+        data = orjson.loads(response.content)
         print(f"📋 Health response: {data}")
         
         required_fields = ["status", "service"]
@@ -49,17 +71,14 @@ async def test_health_endpoint_structure():
 async def test_health_endpoint_mcp_info():
     """Test that health endpoint includes MCP server information."""
     try:
-        from main import app
-        from fastapi.testclient import TestClient
-        
-        client = TestClient(app)
+        client = CLIENT
         response = client.get("/health")
         
         if response.status_code != 200:
             print("⚠️  Skipping MCP info test - health endpoint not available")
             return False
         
-        data = response.json()
+        data = orjson.loads(response.content)
         
         # Check for MCP-related information
         mcp_fields = ["servers", "server_names"]
@@ -80,20 +99,19 @@ async def test_health_endpoint_mcp_info():
 async def test_health_endpoint_performance():
     """Test health endpoint response time."""
     try:
-        from main import app
-        from fastapi.testclient import TestClient
-        import time
+        client = CLIENT
+        iterations = 10
         
-        client = TestClient(app)
-        
-        # Measure response time
-        start_time = time.time()
-        response = client.get("/health")
-        end_time = time.time()
+        # Untimed warm-up so one-time startup work is not counted as request latency
+        client.get("/health")
         
-        response_time = (end_time - start_time) * 1000  # Convert to milliseconds
+        # Measure steady-state response time (monotonic, ns resolution), averaged
+        start_ns = time.perf_counter_ns()
+        for _ in range(iterations):
+            client.get("/health")
+        response_time = (time.perf_counter_ns() - start_ns) / 1e6 / iterations  # Milliseconds per call
         
-        print(f"⏱️  Health endpoint response time: {response_time:.2f}ms")
+        print(f"⏱️  Health endpoint response time: {response_time:.2f}ms (avg of {iterations})")
         
         if response_time > 1000:  # 1 second threshold
             print("⚠️  Health endpoint is slow (>1000ms)")
@@ -107,22 +125,21 @@ async def test_health_endpoint_performance():
         return False
 
 async def test_health_endpoint_multiple_calls():
-    """Test health endpoint with multiple rapid calls."""
+    """Test health endpoint with multiple concurrent calls."""
     try:
-        from main import app
-        from fastapi.testclient import TestClient
-        
-        client = TestClient(app)
-        
-        success_count = 0
         total_calls = 5
         
-        print(f"🔄 Testing {total_calls} rapid health check calls...")
+        print(f"🔄 Testing {total_calls} concurrent health check calls...")
         
-        for i in range(total_calls):
-            response = client.get("/health")
-            if response.status_code == 200:
-                success_count += 1
+        # In-memory ASGI transport on the current loop, so the calls really run concurrently
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = await asyncio.gather(*(client.get("/health") for _ in range(total_calls)))
+        
+        success_count = sum(
+            1 for response in responses
+            if response.status_code == 200 and orjson.loads(response.content).get("status") == "healthy"
+        )
         
         success_rate = (success_count / total_calls) * 100
         print(f"📊 Success rate: {success_rate:.1f}% ({success_count}/{total_calls})")
@@ -141,10 +158,7 @@ async def test_health_endpoint_multiple_calls():
 async def test_health_vs_root_endpoint():
     """Test consistency between health and root endpoints."""
     try:
-        from main import app
-        from fastapi.testclient import TestClient
-        
-        client = TestClient(app)
+        client = CLIENT
         
         health_response = client.get("/health")
         root_response = client.get("/")
@@ -153,8 +167,8 @@ async def test_health_vs_root_endpoint():
             print("⚠️  Skipping consistency test - endpoints not available")
             return False
         
-        health_data = health_response.json()
-        root_data = root_response.json()
+        health_data = orjson.loads(health_response.content)
+        root_data = orjson.loads(root_response.content)
         
         # Check for consistent service information
         health_service = health_data.get("service")
@@ -178,35 +192,48 @@ async def test_health_vs_root_endpoint():
 async def test_health_endpoint_async():
     """Test health endpoint with async HTTP client."""
     try:
-        import asyncio
-        
         # Start the app in a separate process for true async testing
         print("🔄 Testing health endpoint with async client...")
         
-        async with httpx.AsyncClient() as client:
-            try:
-                # Note: This will fail if server is not running, which is expected
-                response = await client.get("http://localhost:8000/health", timeout=5.0)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    print(f"✅ Async health check successful: {data.get('status')}")
-                    return True
-                else:
-                    print(f"⚠️  Async health check returned {response.status_code}")
-                    return False
-                    
-            except httpx.ConnectError:
-                print("⚠️  Server not running - async test skipped")
-                return True  # Not a failure, just no running server
-            except httpx.TimeoutException:
-                print("❌ Health endpoint timed out")
+        client = get_http_client()
+        try:
+            # Note: This will fail if server is not running, which is expected
+            response = await client.get("http://localhost:8000/health")
+            
+            if response.status_code == 200:
+                data = orjson.loads(response.content)
+                print(f"✅ Async health check successful: {data.get('status')}")
+                return True
+            else:
+                print(f"⚠️  Async health check returned {response.status_code}")
                 return False
                 
+        except httpx.ConnectError:
+            print("⚠️  Server not running - async test skipped")
+            return True  # Not a failure, just no running server
+        except httpx.TimeoutException:
+            print("❌ Health endpoint timed out")
+            return False
+                
     except Exception as e:
         print(f"❌ Error testing async health endpoint: {e}")
         return False
 
+async def _run_all(tests):
+    """Run the tests one after another on one event loop; exceptions are returned, not raised."""
+    results = []
+    try:
+        for test_name, test_func in tests:
+            print(f"Running {test_name}...")
+            try:
+                results.append(await test_func())
+            except Exception as e:
+                results.append(e)
+        return results
+    finally:
+        # The client's connections belong to this loop, so close it before the loop ends
+        await close_http_client()
+
 def main():
     """Run all health check tests."""
     print("=== Testing FastAPI Health Check ===\n")
@@ -223,19 +250,22 @@ def main():
     passed = 0
     failed = 0
     
-    for test_name, test_func in tests:
-        print(f"Running {test_name}...")
-        try:
-            result = asyncio.run(test_func())
-            if result:
-                passed += 1
-                print(f"✅ {test_name} passed\n")
-            else:
-                failed += 1
-                print(f"❌ {test_name} failed\n")
-        except Exception as e:
+    # Run inside the app's lifespan so startup/shutdown handlers are exercised too
+    with CLIENT:
+        results = asyncio.run(_run_all(tests))
+    print()
+    
+    for (test_name, _), result in zip(tests, results):
+        if isinstance(result, Exception):
+            failed += 1
+            print(f"❌ {test_name} crashed: {result}")
+        elif result:
+            passed += 1
+            print(f"✅ {test_name} passed")
+        else:
             failed += 1
-            print(f"❌ {test_name} crashed: {e}\n")
+            print(f"❌ {test_name} failed")
+    print()
     
     print("=== Health Check Test Results ===")
     print(f"✅ Passed: {passed}")
@@ -7,8 +7,14 @@ Tests the Azure OpenAI client under agents/
 import sys
 import os
 import asyncio
+from unittest import mock
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
+from dotenv import load_dotenv
+
+# Load .env once per interpreter, whether run as a script, via run_all.py or under pytest
+load_dotenv()
+
 def test_llm_client_import():
     """Test that LLM client can be imported."""
     try:
@@ -22,21 +28,13 @@ def test_llm_client_import():
 def test_llm_client_configuration():
     """Test LLM client configuration and environment variables."""
     try:
-        import os
-        from dotenv import load_dotenv
-        
-        # Load environment variables
-        load_dotenv()
-        
-        required_vars = [
+        # .env is loaded once at module import
+        required_vars = (
             "AZURE_OPENAI_ENDPOINT",
             "AZURE_OPENAI_API_KEY",
-        ]
+        )
         
-        missing_vars = []
-        for var in required_vars:
-            if not os.getenv(var):
-                missing_vars.append(var)
+        missing_vars = [var for var in required_vars if not os.environ.get(var)]
         
         if missing_vars:
             print(f"⚠️  Missing environment variables: {missing_vars}")
@@ -105,30 +103,13 @@ def test_llm_client_error_handling():
     try:
         from agents.llm_client import get_llm_client
         
-        # Test with invalid environment (temporarily)
-        original_endpoint = os.environ.get("AZURE_OPENAI_ENDPOINT")
-        original_key = os.environ.get("AZURE_OPENAI_API_KEY")
-        
-        # Temporarily remove environment variables
-        if "AZURE_OPENAI_ENDPOINT" in os.environ:
-            del os.environ["AZURE_OPENAI_ENDPOINT"]
-        if "AZURE_OPENAI_API_KEY" in os.environ:
-            del os.environ["AZURE_OPENAI_API_KEY"]
-        
-        # Force re-instantiation by clearing global client
-        import agents.llm_client
-        agents.llm_client._client = None
-        
-        client = get_llm_client()
-        
-        # Restore environment variables
-        if original_endpoint:
-            os.environ["AZURE_OPENAI_ENDPOINT"] = original_endpoint
-        if original_key:
-            os.environ["AZURE_OPENAI_API_KEY"] = original_key
-        
-        # Reset client for future tests
-        agents.llm_client._client = None
+        # Test with invalid environment; both the environment and the cached
+        # global client are restored when the patches exit, even on error
+        with mock.patch.dict(os.environ) as env, mock.patch("agents.llm_client._client", None):
+            env.pop("AZURE_OPENAI_ENDPOINT", None)
+            env.pop("AZURE_OPENAI_API_KEY", None)
+            
+            client = get_llm_client()
         
         if client is None:
             print("✅ LLM client properly handles missing configuration")
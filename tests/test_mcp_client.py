@@ -7,8 +7,22 @@ Tests whether mcp_client can list all available tools
 import sys
 import os
 import asyncio
+from pathlib import Path
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
+import orjson
+
+# Tool listing shared by the listing and structure tests
+_tools = None
+
+async def get_tools_once():
+    """List tools from all servers once per run and reuse the result."""
+    global _tools
+    if _tools is None:
+        from agents.mcp_manager import get_available_mcp_tools
+        _tools = await get_available_mcp_tools()
+    return _tools
+
 def test_mcp_client_import():
     """Test that MCP client modules can be imported."""
     try:
@@ -24,8 +38,10 @@ def test_mcp_client_import():
 def test_mcp_config_loading():
     """Test that MCP configuration can be loaded."""
     try:
-        from agents.mcp_manager import get_mcp_servers
+        from agents.mcp_manager import get_mcp_servers, load_mcp_config
         
+        # The config is no longer loaded on import; the app does it in create_app()
+        load_mcp_config()
         servers = get_mcp_servers()
         print(f"📋 MCP servers loaded: {list(servers.keys())}")
         
@@ -52,8 +68,7 @@ def test_mcp_config_loading():
 async def test_mcp_tool_listing():
     """Test that MCP client can list tools from all servers."""
     try:
-        from agents.mcp_manager import get_available_mcp_tools, get_mcp_servers
-        
+        from agents.mcp_manager import get_mcp_servers
         servers = get_mcp_servers()
         if not servers:
             print("⚠️  No MCP servers available for tool listing test")
@@ -63,7 +78,7 @@ async def test_mcp_tool_listing():
         
         # Test getting tools from all servers
         try:
-            all_tools = await get_available_mcp_tools()
+            all_tools = await get_tools_once()
             print(f"📋 All available tools: {len(all_tools)} tools")
             
             for tool in all_tools:
@@ -79,15 +94,19 @@ async def test_mcp_tool_listing():
         except Exception as e:
             print(f"❌ Error getting tools from all servers: {e}")
             
-            # Try individual server testing
+            # Try individual server testing, all servers concurrently
+            from agents.mcp_manager import get_available_mcp_tools
+            results = await asyncio.gather(
+                *(get_available_mcp_tools(server_name) for server_name in servers),
+                return_exceptions=True
+            )
             success_count = 0
-            for server_name in servers.keys():
-                try:
-                    server_tools = await get_available_mcp_tools(server_name)
-                    print(f"✅ Server {server_name}: {len(server_tools)} tools")
+            for server_name, result in zip(servers, results):
+                if isinstance(result, Exception):
+                    print(f"❌ Server {server_name} error: {result}")
+                else:
+                    print(f"✅ Server {server_name}: {len(result)} tools")
                     success_count += 1
-                except Exception as server_error:
-                    print(f"❌ Server {server_name} error: {server_error}")
             
             if success_count > 0:
                 print(f"✅ Successfully listed tools from {success_count}/{len(servers)} servers")
@@ -103,9 +122,7 @@ async def test_mcp_tool_listing():
 async def test_mcp_tool_structure():
     """Test that MCP tools have the expected structure."""
     try:
-        from agents.mcp_manager import get_available_mcp_tools
-        
-        tools = await get_available_mcp_tools()
+        tools = await get_tools_once()
         
         if not tools:
             print("⚠️  No tools available for structure test")
@@ -136,7 +153,6 @@ async def test_mcp_server_communication():
     """Test basic MCP server communication."""
     try:
         from agents.mcp_manager import get_mcp_servers
-        
         servers = get_mcp_servers()
         if not servers:
             print("⚠️  No servers available for communication test")
@@ -172,20 +188,19 @@ async def test_mcp_server_communication():
 async def test_mcp_config_file():
     """Test that MCP configuration file exists and is valid."""
     try:
-        config_path = "mcp.config"
+        from agents.mcp_manager import MCP_CONFIG_FILE
         
-        if not os.path.exists(config_path):
-            print(f"❌ MCP config file not found: {config_path}")
+        # One read: a missing file surfaces as FileNotFoundError instead of a separate exists() probe
+        try:
+            config = orjson.loads(Path(MCP_CONFIG_FILE).read_bytes())
+        except FileNotFoundError:
+            print(f"❌ MCP config file not found: {MCP_CONFIG_FILE}")
             return False
         
-        print(f"✅ MCP config file found: {config_path}")
-        
-        # Try to load the configuration
-        from agents.mcp_manager import load_mcp_config
-        config = load_mcp_config()
+        print(f"✅ MCP config file found: {MCP_CONFIG_FILE}")
         
-        if config and "servers" in config:
-            servers = config["servers"]
+        if isinstance(config, dict) and isinstance(config.get("mcpServers"), dict):
+            servers = config["mcpServers"]
             print(f"📋 Config contains {len(servers)} servers")
             
             for server_name, server_config in servers.items():